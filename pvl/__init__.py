@@ -109,19 +109,20 @@ def decode_by_char(f: io.RawIOBase) -> str:
     or an element can no longer be decoded, the accumulated string will
     be returned.
     """
-    s = ''
+    chars = list()
     try:
         for elem in iter(lambda: f.read(1), b''):
             if isinstance(elem, str):
-                s += elem
+                chars.append(elem)
             else:
-                s += elem.decode()
+                chars.append(elem.decode())
     except UnicodeError:
         # Expecting this to mean that we got to the end of decodable
-        # bytes, so we're all done, and pass through to return s.
+        # bytes, so we're all done, and pass through to return what
+        # has been accumulated.
         pass
 
-    return s
+    return ''.join(chars)
 
 
 def loads(s: str, parser=None, grammar=None, decoder=None, **kwargs):
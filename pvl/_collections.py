@@ -107,12 +107,16 @@ class OrderedMultiDict(dict, MutableMapping):
 
     def __init__(self, *args, **kwargs):
         self.__items = []
+        # Incremented whenever the contents change, so that something
+        # derived from them can tell whether it is out of date.
+        self._version = 0
         self.extend(*args, **kwargs)
 
     def __setitem__(self, key, value):
         if key not in self:
             return self.append(key, value)
 
+        self._version += 1
         dict_setitem(self, key, [value])
         iteritems = iter(self.__items)
 
@@ -132,6 +136,7 @@ class OrderedMultiDict(dict, MutableMapping):
 
     def __delitem__(self, key):
         dict_delitem(self, key)
+        self._version += 1
         self.__items = [item for item in self.__items if item[0] != key]
 
     def __iter__(self):
@@ -189,6 +194,7 @@ class OrderedMultiDict(dict, MutableMapping):
     def clear(self):
         dict_clear(self)
         self.__items = []
+        self._version += 1
 
     def discard(self, key):
         try:
@@ -201,6 +207,7 @@ class OrderedMultiDict(dict, MutableMapping):
         it already exists.
         """
         self.__items.append((key, value))
+        self._version += 1
 
         try:
             dict_getitem(self, key).append(value)
@@ -242,6 +249,7 @@ class OrderedMultiDict(dict, MutableMapping):
                            'is empty')
 
         key, _ = item = self.__items.pop()
+        self._version += 1
         values = dict_getitem(self, key)
         values.pop()
 
@@ -293,6 +301,7 @@ class OrderedMultiDict(dict, MutableMapping):
         index = self._get_index_for_insert(key, instance)
         index = index + 1 if is_after else index
         self.__items = self.__items[:index] + new_item + self.__items[index:]
+        self._version += 1
         # Make sure indexing works with new items
         for new_key, new_value in new_item:
             if new_key in self:
@@ -17,7 +17,7 @@ by the parser) to the appropriate Python type.
 
 import re
 from datetime import datetime, timedelta, timezone
-from itertools import repeat, chain
+from itertools import chain, repeat
 from warnings import warn
 
 from .grammar import PVLGrammar, ODLGrammar
@@ -45,6 +45,46 @@ def for_try_except(exception, function, *iterable):
     raise exception
 
 
+def match_datetime(pattern, value: str, formats=()) -> datetime:
+    """Returns a Python ``datetime`` based on *value*, if it fully
+    matches *pattern*, which is expected to be a compiled regular
+    expression from :func:`pvl.grammar.formats_re()`.  If *value*
+    does not match, or the matched values are not valid for a
+    ``datetime``, a ValueError will be raised.
+
+    The result is the same as that of ``datetime.strptime()`` with
+    the format that *value* matched.
+
+    If *pattern* is None (because formats_re() couldn't translate
+    them), then each of the *formats* is tried in turn with
+    ``datetime.strptime()`` instead.
+    """
+    if pattern is None:
+        return for_try_except(ValueError, datetime.strptime,
+                              repeat(value), formats)
+
+    match = pattern.fullmatch(value)
+    if match is None:
+        raise ValueError(f'The value "{value}" does not match any of the '
+                         'date or time formats.')
+
+    # The directive letter of each of the matched format's groups.
+    d = {k[0]: v for k, v in match.groupdict().items()
+         if v is not None and not k.startswith('fmt')}
+
+    year = int(d.get('Y', 1900))
+    if 'j' in d:
+        date = datetime.fromordinal(datetime(year, 1, 1).toordinal() +
+                                    int(d['j']) - 1)
+        (year, month, day) = (date.year, date.month, date.day)
+    else:
+        (month, day) = (int(d.get('m', 1)), int(d.get('d', 1)))
+
+    return datetime(year, month, day,
+                    int(d.get('H', 0)), int(d.get('M', 0)),
+                    int(d.get('S', 0)), int(d.get('f', '0').ljust(6, '0')))
+
+
 class QuantityError(Exception):
     """A simple exception to distinguish errors from Quantity classes."""
     pass
@@ -120,16 +160,13 @@ class PVLDecoder(object):
                     raise ValueError('Expected a Simple Value, but encountered '
                                      f'{coll[0]} in "{self}": "{item}".')
 
-        agg_keywords = self.grammar.aggregation_keywords.items()
-        for kw in chain.from_iterable(agg_keywords):
-            if kw.casefold() == value.casefold():
-                raise ValueError('Expected a Simple Value, but encountered '
-                                 f'an aggregation keyword: "{value}".')
+        if self.grammar.is_aggregation_keyword(value):
+            raise ValueError('Expected a Simple Value, but encountered '
+                             f'an aggregation keyword: "{value}".')
 
-        for es in self.grammar.end_statements:
-            if es.casefold() == value.casefold():
-                raise ValueError('Expected a Simple Value, but encountered '
-                                 f'an End-Statement: "{value}".')
+        if self.grammar.is_end_statement(value):
+            raise ValueError('Expected a Simple Value, but encountered '
+                             f'an End-Statement: "{value}".')
 
         # This try block is going to look illogical.  But the decode
         # rules for Unquoted Strings spell out the things that they
@@ -174,13 +211,12 @@ class PVLDecoder(object):
         grammar, raises ValueError otherwise.
         """
         # Non-Decimal (Binary, Hex, and Octal)
-        for nd_re in (self.grammar.binary_re,
-                      self.grammar.octal_re,
-                      self.grammar.hex_re):
-            match = nd_re.fullmatch(value)
-            if match is not None:
-                d = match.groupdict('')
-                return int(d['sign'] + d['non_decimal'], base=int(d['radix']))
+        # A single match finds the radix, and then int() raises a
+        # ValueError if any of the digits aren't valid for it.
+        match = self.grammar.nondecimal_re.fullmatch(value)
+        if match is not None:
+            d = match.groupdict('')
+            return int(d['sign'] + d['non_decimal'], base=int(d['radix']))
         raise ValueError
 
     def decode_datetime(self, value: str):
@@ -212,18 +248,15 @@ class PVLDecoder(object):
         numerical types, and do something useful with them.
         """
         try:
-            return for_try_except(ValueError, datetime.strptime,
-                                  repeat(value),
+            return match_datetime(self.grammar.date_re, value,
                                   self.grammar.date_formats).date()
         except ValueError:
             try:
-                return for_try_except(ValueError, datetime.strptime,
-                                      repeat(value),
+                return match_datetime(self.grammar.time_re, value,
                                       self.grammar.time_formats).time()
             except ValueError:
                 try:
-                    return for_try_except(ValueError, datetime.strptime,
-                                          repeat(value),
+                    return match_datetime(self.grammar.datetime_re, value,
                                           self.grammar.datetime_formats)
                 except ValueError:
                     pass
@@ -293,16 +326,6 @@ class ODLDecoder(PVLDecoder):
                 return dt.replace(tzinfo=timezone(offset))
             raise ValueError
 
-    def decode_non_decimal(self, value: str) -> int:
-        """Extends parent function by allowing the wider variety of
-        radix values that ODL permits over PVL.
-        """
-        match = self.grammar.nondecimal_re.fullmatch(value)
-        if match is not None:
-            d = match.groupdict('')
-            return int(d['sign'] + d['non_decimal'], base=int(d['radix']))
-        raise ValueError
-
     def decode_quoted_string(self, value: str) -> str:
         """Extends parent function because the
         ODL specification allows for a dash (-) line continuation
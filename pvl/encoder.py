@@ -14,8 +14,9 @@ string values that conform to a PVL specification.
 import datetime
 import re
 import textwrap
+import weakref
 
-from collections import abc
+from collections import abc, Counter
 from warnings import warn
 
 from ._collections import PVLObject, PVLGroup, Units
@@ -72,6 +73,22 @@ class PVLEncoder(object):
         self.aggregation_end = aggregation_end
         self.newline = newline
 
+        # encode_simple_value() looks up the exact type of a value
+        # here first, and only falls back to a chain of isinstance()
+        # checks for other types (like subclasses of these).
+        self._simple_encoders = {
+            type(None): self._encode_none,
+            set: self.encode_set,
+            frozenset: self.encode_set,
+            list: self.encode_sequence,
+            datetime.datetime: self.encode_datetype,
+            datetime.date: self.encode_datetype,
+            datetime.time: self.encode_datetype,
+            bool: self._encode_bool,
+            int: self._encode_number,
+            float: self._encode_number,
+            str: self.encode_string}
+
         # This list of 3-tuples *always* has our own pvl quantity object,
         # and should *only* be added to with self.add_quantity_cls().
         self.quantities = [(Units, 'value', 'units')]
@@ -129,11 +146,18 @@ class PVLEncoder(object):
 
         prefix = level * (self.indent * ' ')
 
-        if len(prefix + s + self.newline) > self.width and '=' in s:
+        if(len(prefix) + len(s) + len(self.newline) > self.width and
+           '=' in s):
             (preq, _, posteq) = s.partition('=')
             new_prefix = prefix + preq.strip() + ' = '
+            value = posteq.strip()
+
+            # A value without any whitespace can't be broken
+            # (long words aren't), so it doesn't need wrapping.
+            if len(value.split(maxsplit=1)) == 1:
+                return new_prefix + value
 
-            lines = textwrap.wrap(posteq.strip(),
+            lines = textwrap.wrap(value,
                                   width=(self.width - len(self.newline)),
                                   replace_whitespace=False,
                                   initial_indent=new_prefix,
@@ -161,14 +185,14 @@ class PVLEncoder(object):
         # Final check to ensure we're sending out the right character set:
         s = self.newline.join(lines)
 
-        for i, c in enumerate(s):
-            if not self.grammar.char_allowed(c):
-                raise ValueError('Encountered a character that was not '
-                                 'a valid character according to the '
-                                 f'grammar: "{c}", it is in: '
-                                 '"{}"'.format(s[i - 5, i + 5]))
+        i = self.grammar.validate(s)
+        if i >= 0:
+            raise ValueError('Encountered a character that was not '
+                             'a valid character according to the '
+                             f'grammar: "{s[i]}", it is in: '
+                             '"{}"'.format(s[max(i - 5, 0):i + 5]))
 
-        return self.newline.join(lines)
+        return s
 
     def encode_module(self, module: dict, level: int = 0) -> str:
         """Returns a ``str`` formatted as a PVL module based
@@ -213,20 +237,16 @@ class PVLEncoder(object):
         else:
             raise ValueError('The value {value} is not dict-like.')
 
-        agg_begin = '{} = {}'.format(agg_keywords[0], key)
-        if self.end_delimiter:
-            agg_begin += self.grammar.delimiters[0]
-        lines.append(self.format(agg_begin, level))
+        delim = self.grammar.delimiters[0] if self.end_delimiter else ''
+
+        lines.append(self.format(f'{agg_keywords[0]} = {key}{delim}', level))
 
         lines.append(self.encode_module(value, (level + 1)))
 
-        agg_end = ''
         if self.aggregation_end:
-            agg_end += '{} = {}'.format(agg_keywords[1], key)
+            agg_end = f'{agg_keywords[1]} = {key}{delim}'
         else:
-            agg_end += agg_keywords[1]
-        if self.end_delimiter:
-            agg_end += self.grammar.delimiters[0]
+            agg_end = agg_keywords[1] + delim
         lines.append(self.format(agg_end, level))
 
         return self.newline.join(lines)
@@ -244,28 +264,17 @@ class PVLEncoder(object):
         if key_len is None:
             key_len = len(key)
 
-        s = ''
-        s += '{} = '.format(key.ljust(key_len))
+        s = '{} = '.format(key.ljust(key_len))
 
         enc_val = self.encode_value(value)
+        delim = self.grammar.delimiters[0] if self.end_delimiter else ''
 
         if enc_val.startswith(self.grammar.quotes):
             # deal with quoted lines that need to preserve
             # newlines
-            s = self.format(s, level)
-            s += enc_val
-
-            if self.end_delimiter:
-                s += self.grammar.delimiters[0]
-
-            return s
+            return self.format(s, level) + enc_val + delim
         else:
-            s += enc_val
-
-            if self.end_delimiter:
-                s += self.grammar.delimiters[0]
-
-            return self.format(s, level)
+            return self.format(s + enc_val + delim, level)
 
     def encode_value(self, value) -> str:
         """Returns a ``str`` formatted as a PVL Value based
@@ -300,8 +309,12 @@ class PVLEncoder(object):
         """Returns a ``str`` formatted as a PVL Simple Value based
         on the *value* object according to the rules of this encoder.
         """
+        encode = self._simple_encoders.get(type(value))
+        if encode is not None:
+            return encode(value)
+
         if value is None:
-            return self.grammar.none_keyword
+            return self._encode_none(value)
         elif isinstance(value, (set, frozenset)):
             return self.encode_set(value)
         elif isinstance(value, list):
@@ -310,22 +323,41 @@ class PVLEncoder(object):
                                 datetime.time)):
             return self.encode_datetype(value)
         elif isinstance(value, bool):
-            if value:
-                return self.grammar.true_keyword
-            else:
-                return self.grammar.false_keyword
+            return self._encode_bool(value)
         elif isinstance(value, (int, float)):
-            return repr(value)
+            return self._encode_number(value)
         elif isinstance(value, str):
             return self.encode_string(value)
         else:
             raise TypeError(f'{value!r} is not serializable.')
 
+    def _encode_none(self, value) -> str:
+        """Returns the grammar's none_keyword, this is an
+        encode_simple_value() helper function.
+        """
+        return self.grammar.none_keyword
+
+    def _encode_bool(self, value: bool) -> str:
+        """Returns the grammar's true_keyword or false_keyword for
+        *value*, this is an encode_simple_value() helper function.
+        """
+        if value:
+            return self.grammar.true_keyword
+        else:
+            return self.grammar.false_keyword
+
+    @staticmethod
+    def _encode_number(value) -> str:
+        """Returns the repr() of the int or float *value*, this is an
+        encode_simple_value() helper function.
+        """
+        return repr(value)
+
     def encode_setseq(self, values: abc.Collection) -> str:
         """This function provides shared functionality for
         encode_sequence() and encode_set().
         """
-        return ', '.join([self.encode_value(v) for v in values])
+        return ', '.join(map(self.encode_value, values))
 
     def encode_sequence(self, value: abc.Sequence) -> str:
         """Returns a ``str`` formatted as a PVL Sequence based
@@ -359,21 +391,22 @@ class PVLEncoder(object):
         """Returns a ``str`` formatted as a PVL Date based
         on the *value* object according to the rules of this encoder.
         """
-        return f'{value:%Y-%m-%d}'
+        return '%04d-%02d-%02d' % (value.year, value.month, value.day)
 
     @staticmethod
     def encode_time(value: datetime.time) -> str:
         """Returns a ``str`` formatted as a PVL Time based
         on the *value* object according to the rules of this encoder.
         """
-        s = f'{value:%H:%M}'
-
+        # These %-style templates are much faster than strftime().
         if value.microsecond:
-            s += f':{value:%S.%f}'
+            return '%02d:%02d:%02d.%06d' % (value.hour, value.minute,
+                                            value.second, value.microsecond)
         elif value.second:
-            s += f':{value:%S}'
-
-        return s
+            return '%02d:%02d:%02d' % (value.hour, value.minute,
+                                       value.second)
+        else:
+            return '%02d:%02d' % (value.hour, value.minute)
 
     def encode_datetime(self, value: datetime.datetime) -> str:
         """Returns a ``str`` formatted as a PVL Date/Time based
@@ -387,7 +420,11 @@ class PVLEncoder(object):
         """Returns true if *s* must be quoted according to this
         encoder's grammar, false otherwise.
         """
-        if any(c in self.grammar.whitespace for c in s):
+        # A string with whitespace or a reserved character in it
+        # isn't an Unquoted String, and one pass over it finds either,
+        # without needing to construct and examine a Token.
+        g = self.grammar
+        if not (g.whitespace_set | g.reserved_set).isdisjoint(s):
             return True
 
         if s in self.grammar.reserved_keywords:
@@ -589,12 +626,9 @@ class ODLEncoder(PVLEncoder):
             raise ValueError(f'The keyword "{key}" is not a valid ODL '
                              'Identifier.')
 
-        s = ''
-        s += '{} = '.format(ident.ljust(key_len))
-        s += self.encode_value(value)
-
-        if self.end_delimiter:
-            s += self.grammar.delimiters[0]
+        delim = self.grammar.delimiters[0] if self.end_delimiter else ''
+        s = '{} = {}{}'.format(ident.ljust(key_len),
+                               self.encode_value(value), delim)
 
         return self.format(s, level)
 
@@ -739,6 +773,11 @@ class PDSLabelEncoder(ODLEncoder):
         self.convert_group_to_object = convert_group_to_object
         self.tab_replace = tab_replace
 
+        # The results of is_PDSgroup(), keyed by the id() of the group,
+        # as three-tuples of a weak reference to the group, its
+        # _version, and the result.
+        self._PDSgroup_cache = dict()
+
     @staticmethod
     def count_aggs(module: dict, obj_count: int = 0,
                    grp_count: int = 0) -> tuple((int, int)):
@@ -750,17 +789,16 @@ class PDSLabelEncoder(ODLEncoder):
         # in module, it does not 'recurse' if those aggregations also
         # may contain aggregations.
 
-        for k, v in module.items():
-            if isinstance(v, dict):
-                if isinstance(v, PVLGroup):
-                    grp_count += 1
-                elif isinstance(v, PVLObject):
-                    obj_count += 1
-                else:
-                    # We treat other dict-like Python objects as
-                    # PVLObjects for the purposes of this count,
-                    # because that is how they will be encoded.
-                    obj_count += 1
+        # The values are tallied by type, so that the checks below
+        # are only done once for each distinct type.
+        for t, n in Counter(map(type, module.values())).items():
+            if issubclass(t, PVLGroup):
+                grp_count += n
+            elif issubclass(t, dict):
+                # We treat other dict-like Python objects (including
+                # PVLObjects) as PVLObjects for the purposes of this
+                # count, because that is how they will be encoded.
+                obj_count += n
 
         return (obj_count, grp_count)
 
@@ -838,6 +876,33 @@ class PDSLabelEncoder(ODLEncoder):
 
         Item 5: *PSDD* is not defined anywhere in the ODL PDS document,
         so don't know how to test for it.
+
+        This encoder keeps the result for a PVLGroup (or other pvl
+        collection), and reuses it until the group's contents change.
+        That only helps if the same encoder is used again, since
+        pvl.dump() and pvl.dumps() construct a new encoder each time,
+        while every change to a pvl collection pays to update the
+        _version that this relies on.
+        """
+        version = getattr(group, '_version', None)
+        if version is None:
+            return self._is_PDSgroup(group)
+
+        key = id(group)
+        cached = self._PDSgroup_cache.get(key)
+        if(cached is not None and cached[0]() is group and
+           cached[1] == version):
+            return cached[2]
+
+        result = self._is_PDSgroup(group)
+        cache = self._PDSgroup_cache
+        ref = weakref.ref(group, lambda r: cache.pop(key, None))
+        cache[key] = (ref, version, result)
+        return result
+
+    def _is_PDSgroup(self, group: dict) -> bool:
+        """Returns the result of is_PDSgroup() without using or
+        storing a cached result.
         """
         (obj_count, grp_count) = self.count_aggs(group)
 
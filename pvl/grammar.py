@@ -9,6 +9,89 @@
 
 import re
 
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
+
+# These are the regular expressions that the datetime.strptime()
+# function uses for each of the format directives that are in the
+# date and time formats of the grammars.
+_strptime_directives = {
+    'Y': r'\d\d\d\d',
+    'm': r'1[0-2]|0[1-9]|[1-9]',
+    'd': r'3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9]',
+    'j': r'36[0-6]|3[0-5]\d|[1-2]\d\d|0[1-9]\d|00[1-9]|[1-9]\d|0[1-9]|[1-9]',
+    'H': r'2[0-3]|[0-1]\d|\d',
+    'M': r'[0-5]\d|\d',
+    'S': r'6[0-1]|[0-5]\d|\d',
+    'f': r'[0-9]{1,6}'}
+
+
+def formats_re(formats):
+    """Returns a compiled regular expression that is an alternation
+    of the datetime.strptime() format strings in *formats*, such that
+    a string will fully match it if it would be matched by
+    datetime.strptime() with one of those format strings.
+
+    Each format is wrapped in a group named ``fmt<i>``, where ``<i>``
+    is the index of that format in *formats*, and each directive
+    is captured in a group named for the directive letter followed
+    by that index (e.g. ``Y0`` or ``f3``).  As for strptime(), a run
+    of whitespace in a format matches any run of whitespace.
+
+    Raises a ValueError if any of the *formats* contain a directive
+    that isn't supported.
+    """
+    alternation = list()
+    for i, f in enumerate(formats):
+        frag = ''
+        for piece in re.split('(%.)', f):
+            if piece.startswith('%'):
+                try:
+                    frag += (f'(?P<{piece[1]}{i}>'
+                             f'{_strptime_directives[piece[1]]})')
+                except KeyError:
+                    raise ValueError(f'The "{piece}" directive in "{f}" '
+                                     'is not supported.')
+            else:
+                frag += r'\s+'.join(map(re.escape, re.split(r'\s+', piece)))
+        alternation.append(f'(?P<fmt{i}>{frag})')
+    return re.compile('|'.join(alternation), re.IGNORECASE)
+
+
+# The values that PVLGrammar derives from its other attributes are
+# built by these functions, which are cached on those attributes,
+# so that the properties which return them are cheap, but still
+# follow any change to a grammar instance (or subclass).
+@lru_cache(maxsize=32)
+def _frozen(chars: tuple) -> frozenset:
+    return frozenset(chars)
+
+
+@lru_cache(maxsize=32)
+def _numeric_start_re(chars: tuple):
+    return re.compile('[{}]\\d'.format(re.escape(''.join(chars))))
+
+
+@lru_cache(maxsize=32)
+def _formats_re(formats: tuple):
+    try:
+        return formats_re(formats)
+    except ValueError:
+        # Formats that formats_re() can't translate are left to
+        # datetime.strptime(), see pvl.decoder.match_datetime().
+        return None
+
+
+@lru_cache(maxsize=32)
+def _casefolded(keywords: frozenset) -> frozenset:
+    return frozenset(k.casefold() for k in keywords)
+
+
+@lru_cache(maxsize=32)
+def _casefolded_keys(items: tuple) -> MappingProxyType:
+    return MappingProxyType({k.casefold(): v for k, v in items})
+
 
 class PVLGrammar():
     """Describes a PVL grammar for use by the lexer and parser.
@@ -74,11 +157,14 @@ class PVLGrammar():
     # [sign]radix#non_decimal_integer#
     _s = r'(?P<sign>[+-]?)'
     nondecimal_pre_re = re.compile(fr'{_s}(?P<radix>2|8|16)#')
+    # The decoder only uses nondecimal_re, and lets int() check the
+    # digits against the radix, these three are kept for users
+    # who want to tell the kinds of non-decimal numbers apart.
     binary_re = re.compile(fr'{_s}(?P<radix>2)#(?P<non_decimal>[01]+)#')
     octal_re = re.compile(fr'{_s}(?P<radix>8)#(?P<non_decimal>[0-7]+)#')
-    hex_re = re.compile(fr'{_s}(?P<radix>16)#(?P<non_decimal>[0-9|A-F|a-f]+)#')
+    hex_re = re.compile(fr'{_s}(?P<radix>16)#(?P<non_decimal>[0-9A-Fa-f]+)#')
     nondecimal_re = re.compile(
-        fr'{nondecimal_pre_re.pattern}(?P<non_decimal>[0-9|A-F|a-f]+)#')
+        fr'{nondecimal_pre_re.pattern}(?P<non_decimal>[0-9A-Fa-f]+)#')
 
     _d_formats = ('%Y-%m-%d', '%Y-%j')
     _t_formats = ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f')
@@ -109,6 +195,111 @@ class PVLGrammar():
     leap_second_Ymd_re = re.compile(fr'({_Ymd_frag}T)?{_time_frag}')
     leap_second_Yj_re = re.compile(fr'({_Yj_frag}T)?{_time_frag}')
 
+    # A lookup table, indexed by ord(), of the characters in the
+    # ISO 8859-1 'latin-1' character set that are allowed in the
+    # PVL Character Set (1 if allowed, 0 if not).
+    # The vertical tab, ord('\v') = 11, is mistakenly
+    # shaded on page B-3 of the PVL specification.
+    _allowed = bytes(0 if (o <= 8 or
+                           14 <= o <= 31 or
+                           127 <= o <= 159) else 1 for o in range(256))
+    _denied = bytes(1 - a for a in _allowed)
+
+    @property
+    def whitespace_set(self) -> frozenset:
+        """A frozenset of the whitespace characters, for fast
+        membership tests.
+        """
+        return _frozen(tuple(self.whitespace))
+
+    @property
+    def reserved_set(self) -> frozenset:
+        """A frozenset of the reserved_characters, for fast
+        membership tests.
+        """
+        return _frozen(tuple(self.reserved_characters))
+
+    @property
+    def numeric_start_re(self):
+        """A compiled regex which matches two characters that begin a
+        number with one of the numeric_start_chars (e.g. '+7'), so that
+        the lexer doesn't need to construct a Token and decode it to
+        find out.
+        """
+        return _numeric_start_re(tuple(self.numeric_start_chars))
+
+    @property
+    def date_re(self):
+        """A single compiled regex that is equivalent to trying each of
+        the date_formats in turn with datetime.strptime(), but much
+        faster, or None if formats_re() can't translate them.
+        """
+        return _formats_re(tuple(self.date_formats))
+
+    @property
+    def time_re(self):
+        """As date_re, but for the time_formats."""
+        return _formats_re(tuple(self.time_formats))
+
+    @property
+    def datetime_re(self):
+        """As date_re, but for the datetime_formats."""
+        return _formats_re(tuple(self.datetime_formats))
+
+    # Casefolded versions of the keywords, so that a keyword check is a
+    # single hash lookup of the casefolded token.
+    @property
+    def _aggregation_cf(self):
+        return _casefolded_keys(tuple(self.aggregation_keywords.items()))
+
+    @property
+    def _aggregation_keywords_cf(self) -> frozenset:
+        return _casefolded(frozenset(
+            chain.from_iterable(self.aggregation_keywords.items())))
+
+    @property
+    def _end_statements_cf(self) -> frozenset:
+        return _casefolded(frozenset(self.end_statements))
+
+    @property
+    def _reserved_cf(self) -> frozenset:
+        return _casefolded(frozenset(self.reserved_keywords))
+
+    @property
+    def comment_starts(self) -> tuple:
+        """A tuple of the character sequences that begin comments."""
+        return tuple(p[0] for p in self.comments)
+
+    @property
+    def comment_ends(self) -> tuple:
+        """A tuple of the character sequences that end comments."""
+        return tuple(p[1] for p in self.comments)
+
+    def is_reserved(self, s: str) -> bool:
+        """Returns true if *s* case-independently matches one of
+        the reserved_keywords, false otherwise.
+        """
+        return s.casefold() in self._reserved_cf
+
+    def is_aggregation_keyword(self, s: str) -> bool:
+        """Returns true if *s* case-independently matches one of the
+        begin or end aggregation_keywords, false otherwise.
+        """
+        return s.casefold() in self._aggregation_keywords_cf
+
+    def is_end_statement(self, s: str) -> bool:
+        """Returns true if *s* case-independently matches one of
+        the end_statements, false otherwise.
+        """
+        return s.casefold() in self._end_statements_cf
+
+    def end_aggregation_for(self, s: str):
+        """Returns the end aggregation keyword that closes the begin
+        aggregation keyword that *s* case-independently matches, or
+        None if *s* doesn't match one.
+        """
+        return self._aggregation_cf.get(s.casefold())
+
     def char_allowed(self, char):
         """Returns true if *char* is allowed in the PVL Character Set.
 
@@ -119,17 +310,32 @@ class PVLGrammar():
             raise Exception
 
         o = ord(char)
+        return o < 256 and bool(self._allowed[o])
 
-        # The vertical tab, ord('\t') = 11, is mistakenly
-        # shaded on page B-3 of the PVL specification.
-        if(o > 255 or
-           (o >= 0 and o <= 8) or
-           # o == 11 or
-           (o >= 14 and o <= 31) or
-           (o >= 127 and o <= 159)):
-            return False
-        else:
-            return True
+    def validate(self, s: str) -> int:
+        """Returns the index of the first character in *s* that
+        is not allowed by char_allowed(), or -1 if they all are.
+
+        This checks the whole string at once, rather than one
+        character at a time, unless a subclass has overridden
+        char_allowed(), in which case that is called for each one.
+        """
+        if type(self).char_allowed is not PVLGrammar.char_allowed:
+            return next((i for i, c in enumerate(s)
+                         if not self.char_allowed(c)), -1)
+
+        try:
+            b = s.encode('latin-1')
+            limit = -1
+        except UnicodeEncodeError as err:
+            # The first character that is beyond latin-1.
+            b = s[:err.start].encode('latin-1')
+            limit = err.start
+
+        # Each allowed character becomes a zero byte,
+        # and each disallowed character becomes a one.
+        i = b.translate(self._denied).find(1)
+        return limit if i < 0 else i
 
 
 class ODLGrammar(PVLGrammar):
@@ -154,23 +360,26 @@ class ODLGrammar(PVLGrammar):
     nondecimal_pre_re = re.compile(
         fr'(?P<radix>[2-9]|1[0-6])#{PVLGrammar._s}')
     nondecimal_re = re.compile(
-        fr'{nondecimal_pre_re.pattern}(?P<non_decimal>[0-9|A-F|a-f]+)#')
+        fr'{nondecimal_pre_re.pattern}(?P<non_decimal>[0-9A-Fa-f]+)#')
 
-    def char_allowed(self, char):
-        """Returns true if *char* is allowed in the ODL Character Set.
+    # The ODL Character Set is limited to ASCII.  This is fewer
+    # characters than PVL, but appears to allow more control
+    # characters to be in quoted strings than PVL does.
+    _allowed = bytes(1 if o < 128 else 0 for o in range(256))
+    _denied = bytes(1 - a for a in _allowed)
 
-        The ODL Character Set is limited to ASCII.  This is fewer
-        characters than PVL, but appears to allow more control
-        characters to be in quoted strings than PVL does.
+    def validate(self, s: str) -> int:
+        """Returns the index of the first character in *s* that
+        is not allowed by char_allowed(), or -1 if they all are.
         """
-        if len(char) != 1:
-            raise Exception
+        if type(self).char_allowed is not PVLGrammar.char_allowed:
+            return super().validate(s)
 
         try:
-            char.encode(encoding='ascii')
-            return True
-        except UnicodeError:
-            return False
+            s.encode('ascii')
+            return -1
+        except UnicodeEncodeError as err:
+            return err.start
 
 
 class ISISGrammar(PVLGrammar):
@@ -242,4 +451,4 @@ class OmniGrammar(PVLGrammar):
     nondecimal_pre_re = re.compile(PVLGrammar._s +
                                    fr'(?P<radix>[2-9]|1[0-6])#{_ss}')
     nondecimal_re = re.compile(nondecimal_pre_re.pattern +
-                               r'(?P<non_decimal>[0-9|A-F|a-f]+)#')
+                               r'(?P<non_decimal>[0-9A-Fa-f]+)#')
@@ -9,12 +9,23 @@
 # top level of this library.
 
 
+import re
+
 from enum import Enum, auto
+from functools import lru_cache
+from string import digits
+from types import MappingProxyType
 
 from .grammar import PVLGrammar
 from .token import Token
 from .decoder import PVLDecoder
 
+# These module-level instances are used when a grammar or decoder
+# isn't provided to the functions below, rather than constructing
+# new ones as default arguments.
+_DEFAULT_GRAMMAR = PVLGrammar()
+_DEFAULT_DECODER = PVLDecoder(_DEFAULT_GRAMMAR)
+
 
 class LexerError(ValueError):
     """Subclass of ValueError with the following additional properties:
@@ -60,6 +71,18 @@ def linecount(doc: str, end: int, start: int = 0):
     return (doc.count('\n', start, end) + 1)
 
 
+def line_starts(doc: str) -> list:
+    """Returns a list of the positions in the string *doc* at which
+    each line begins, the first being zero.
+
+    The line number of a (non-negative) position in *doc* is then
+    ``bisect.bisect_right(line_starts(doc), pos)``, which is the same
+    as linecount(doc, pos), but doesn't need to count the newlines
+    each time.
+    """
+    return [0] + [m.end() for m in re.finditer('\n', doc)]
+
+
 def firstpos(sub: str, pos: int):
     """On the assumption that *sub* is a substring contained in a longer
     string, and *pos* is the index in that longer string of the final
@@ -126,8 +149,8 @@ def lex_singlechar_comments(char: str, lexeme: str, preserve: dict,
 
 def lex_multichar_comments(char: str, prev_char: str, next_char: str,
                            lexeme: str, preserve: dict,
-                           comments: tuple(tuple((str, str))) =
-                           PVLGrammar().comments) -> tuple((str, dict)):
+                           comments: tuple(tuple((str, str))) = None
+                           ) -> tuple((str, dict)):
     """Returns a modified *lexeme* string and a modified *preserve*
     dict in a two-tuple.
 
@@ -144,8 +167,12 @@ def lex_multichar_comments(char: str, prev_char: str, next_char: str,
     This function will determine whether to append *char* to
     *lexeme* or not, and will set the value of the 'state' and
     'end' values of *preserve* appropriately.
+
+    If *comments* is None, the comments of the default PVLGrammar
+    are used.
     """
     # print(f'lex_multichar got these comments: {comments}')
+    comments = _DEFAULT_GRAMMAR.comments if comments is None else comments
     if len(comments) == 0:
         raise ValueError('The variable provided to comments is empty.')
 
@@ -177,7 +204,7 @@ def lex_multichar_comments(char: str, prev_char: str, next_char: str,
 def lex_comment(char: str, prev_char: str, next_char: str,
                 lexeme: str, preserve: dict,
                 comments: tuple(tuple((str, str))),
-                c_info: dict) -> tuple((str, dict)):
+                c_info: dict = None) -> tuple((str, dict)):
     """Returns a modified *lexeme* string and a modified *preserve*
     dict in a two-tuple.
 
@@ -188,7 +215,12 @@ def lex_comment(char: str, prev_char: str, next_char: str,
     This function just makes the decision about whether to call
     lex_multichar_comments() or lex_singlechar_comments(), and
     then returns what they return.
+
+    If *c_info* is None, the (cached) result of
+    _prepare_comment_tuples() for *comments* is used.
     """
+    if c_info is None:
+        c_info = _prepare_comment_tuples(comments)
 
     if char in c_info['multi_chars']:
         return lex_multichar_comments(char, prev_char, next_char,
@@ -219,12 +251,15 @@ def _next_char(s: str, idx: int):
         return None
 
 
+@lru_cache(maxsize=32)
 def _prepare_comment_tuples(comments: tuple(tuple((str, str)))) -> dict:
     """Returns a dict of information based on the contents
     of *comments*.
 
     This is a lexer() helper function to prepare information
-    for lexer().
+    for lexer().  The result is cached for each distinct
+    *comments*, so it (and its 'single_comments' value) is
+    returned as a read-only ``types.MappingProxyType``.
     """
     # I initially tried to avoid this function, if you
     # don't pre-compute this stuff, you end up re-computing
@@ -233,26 +268,27 @@ def _prepare_comment_tuples(comments: tuple(tuple((str, str)))) -> dict:
     d = dict()
     m = list()
     d['single_comments'] = dict()
-    d['multi_chars'] = set()
+    multi_chars = set()
     for pair in comments:
         if len(pair[0]) == 1:
             d['single_comments'][pair[0]] = pair[1]
         else:
             m.append(pair)
             for p in pair:
-                d['multi_chars'] |= set(p)
+                multi_chars |= set(p)
 
-    d['chars'] = set(d['single_comments'].keys())
-    d['chars'] |= d['multi_chars']
+    d['multi_chars'] = frozenset(multi_chars)
+    d['chars'] = d['multi_chars'].union(d['single_comments'].keys())
     d['multi_comments'] = tuple(m)
+    d['single_comments'] = MappingProxyType(d['single_comments'])
 
     # print(d)
-    return d
+    return MappingProxyType(d)
 
 
 def lex_char(char: str, prev_char: str, next_char: str,
              lexeme: str, preserve: dict,
-             g: PVLGrammar, c_info: dict) -> tuple((str, dict)):
+             g: PVLGrammar, c_info: dict = None) -> tuple((str, dict)):
     """Returns a modified *lexeme* string and a modified *preserve*
     dict in a two-tuple.
 
@@ -260,7 +296,12 @@ def lex_char(char: str, prev_char: str, next_char: str,
     to modify (or not) *lexeme* and *preserve* based on the
     single character in *char* and the other values passed into
     this function.
+
+    If *c_info* is None, the (cached) result of
+    _prepare_comment_tuples() for the comments of *g* is used.
     """
+    if c_info is None:
+        c_info = _prepare_comment_tuples(g.comments)
 
     # When we are 'in' a comment or a units expression,
     # we want those to consume everything, regardless.
@@ -298,13 +339,63 @@ def lex_char(char: str, prev_char: str, next_char: str,
         lexeme += char
         preserve = dict(state=Preserve.QUOTE, end=char)
     else:
-        if char not in g.whitespace:
+        if char not in g.whitespace_set:
             lexeme += char  # adding a char each time
 
     # print(f'lex_char end: char "{char}", lexeme "{lexeme}", "{preserve}"')
     return (lexeme, preserve)
 
 
+# The same lexemes (numbers, dates, and times) recur throughout a
+# PVL document, and from one document to the next, so the results of
+# these two decodings are cached.  The cache keys hold the grammar
+# formats and regexes, and the decoder class, that the results depend
+# on, rather than the grammar and decoder objects, so that equivalent
+# objects share results, and none of them are kept alive by the cache.
+_DECODE_CACHE = dict()
+_DECODE_CACHE_MAX = 1024
+
+
+def _cached_decode(key: tuple, func) -> bool:
+    """Returns the result of calling *func*, which takes no arguments,
+    remembered in _DECODE_CACHE under *key*.
+    """
+    try:
+        return _DECODE_CACHE[key]
+    except KeyError:
+        pass
+
+    if len(_DECODE_CACHE) >= _DECODE_CACHE_MAX:
+        _DECODE_CACHE.clear()
+    result = func()
+    _DECODE_CACHE[key] = result
+    return result
+
+
+def _is_numeric(lexeme: str, g: PVLGrammar) -> bool:
+    """Returns the result of a Token's is_numeric() function for
+    a Token made from *lexeme* and the grammar *g*.
+
+    This is a lex_continue() helper function.
+    """
+    return _cached_decode(('numeric', lexeme, g.nondecimal_re),
+                          lambda: Token(lexeme, grammar=g).is_numeric())
+
+
+def _is_datetime(lexeme: str, g: PVLGrammar, d: PVLDecoder) -> bool:
+    """Returns the result of a Token's is_datetime() function for
+    a Token made from *lexeme*, the grammar *g*, and the decoder *d*.
+
+    This is a lex_continue() helper function.
+    """
+    dg = d.grammar
+    key = ('datetime', lexeme, type(d), tuple(dg.date_formats),
+           tuple(dg.time_formats), tuple(dg.datetime_formats),
+           dg.leap_second_Ymd_re, dg.leap_second_Yj_re)
+    return _cached_decode(
+        key, lambda: Token(lexeme, grammar=g, decoder=d).is_datetime())
+
+
 def lex_continue(char: str, next_char: str, lexeme: str,
                  token: Token, preserve: dict, g: PVLGrammar) -> bool:
     """Return True if accumulation of *lexeme* should continue based
@@ -326,7 +417,7 @@ def lex_continue(char: str, next_char: str, lexeme: str,
     # character, the reserved characters may split up
     # the lexeme.
     if(char in g.numeric_start_chars and
-       Token(char + next_char, grammar=g).is_numeric()):
+       g.numeric_start_re.fullmatch(char + next_char) is not None):
         return True
 
     # Since Non Decimal Numerics can have reserved characters in them.
@@ -337,63 +428,250 @@ def lex_continue(char: str, next_char: str, lexeme: str,
     # make sure we can parse scientific notation correctly:
     if(char.lower() == 'e'
        and next_char in g.numeric_start_chars
-       and Token(lexeme + next_char + '2', grammar=g).is_numeric()):
+       and _is_numeric(lexeme + next_char + '2', g)):
         return True
 
     # Some datetimes can have trailing numeric tz offsets,
     # if the decoder allows it, this means there could be
     # a '+' that splits the lexeme that we don't want.
-    if (next_char in g.numeric_start_chars and token.is_datetime()):
+    if(next_char in g.numeric_start_chars and
+       _is_datetime(str(token), token.grammar, token.decoder)):
         return True
 
     return False
 
 
-def lexer(s: str, g=PVLGrammar(), d=PVLDecoder()):
-    """This is a generator function that returns pvl.Token objects
-    based on the passed in string, *s*, when the generator's
-    next() is called.
+# The compiled patterns that lexer() uses are built once per distinct
+# set of grammar attributes and kept here, so that repeated calls to
+# lexer() with the same (or an equivalent) grammar don't recompile them.
+_MASTER_RE_CACHE = dict()
 
-    A call to send(*t*) will 'return' the value *t* to the
-    generator, which will be yielded upon calling next().
-    This allows a user to 'peek' at the next token, but return it
-    if they don't like what they see.
 
-    *g* is expected to be an instance of pvl.grammar, and *d* an
-    instance of pvl.decoder.  The lexer will perform differently,
-    given different values of *g* and *d*.
+def _char_class(chars) -> str:
+    """Returns a string suitable for use inside a regex character
+    class (the square brackets) that matches each of the
+    characters in *chars*.
+    """
+    return ''.join(re.escape(c) for c in chars)
+
+
+def _trie_re(strings) -> str:
+    """Returns a regular expression (without any enclosing group)
+    which matches any of the *strings*, preferring the longest.
+
+    The *strings* are arranged in a trie (a nested dict, keyed by
+    character), so that strings which share a prefix share a branch
+    of the regex, and the regex engine never needs to try more than
+    one alternative which begins with the same character.
+    """
+    trie = dict()
+    for string in strings:
+        node = trie
+        for char in string:
+            node = node.setdefault(char, dict())
+        node[''] = None
+
+    def _pattern(node: dict) -> str:
+        branches = [re.escape(c) + _pattern(node[c]) for c in node if c]
+        if not branches:
+            return ''
+        if '' in node:
+            branches.append('')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return _pattern(trie)
+
+
+def _master_re(g: PVLGrammar) -> dict:
+    """Returns a dict of compiled regular expressions used by
+    lexer() to scan a string according to the grammar *g*.
+
+    This is a lexer() helper function.  The returned dict has
+    these keys:
+
+    'token': The master pattern whose named groups (COMMENT,
+        QUOTED, WORD, RESERVED, and WS) classify the next lexeme.
+        Any whitespace in front of a lexeme is consumed by the same
+        match, so the WS group only matches trailing whitespace.
+        The COMMENT group only matches the sequence that begins a
+        comment.
+    'comment_ends': A dict whose keys are the sequences that begin
+        a comment, and whose values are the sequences that end them.
+    'plain': Matches a run of characters that may continue a
+        lexeme.
+    'nondecimal': Matches the octothorpe-delimited portion of
+        a non-decimal number.
+    'continuers': The characters which, if they follow a lexeme,
+        might continue it (see lex_continue()).
     """
-    c_info = _prepare_comment_tuples(g.comments)
-    # print(c_info)
+    key = (g.whitespace, g.reserved_characters, g.comments,
+           g.quotes, g.units_delimiters)
+    try:
+        return _MASTER_RE_CACHE[key]
+    except KeyError:
+        pass
+
+    ws = _char_class(g.whitespace)
+    rc = _char_class(g.reserved_characters)
+    starts = _trie_re(g.comment_starts)
+    if starts:
+        # Only a character that could begin a comment needs the
+        # lookahead, every other character is matched by the first
+        # alternative.
+        firsts = _char_class(sorted(set(c[0] for c in g.comment_starts)))
+        plain = fr'(?:[^{ws}{rc}{firsts}]|(?!{starts})[^{ws}{rc}])'
+    else:
+        plain = fr'[^{ws}{rc}]'
+
+    quoted = '|'.join(fr'{re.escape(q)}[^{re.escape(q)}]*'
+                      fr'(?:{re.escape(q)}|\Z)' for q in g.quotes)
+    (u_start, u_end) = (re.escape(u) for u in g.units_delimiters)
+    units = fr'{u_start}[^{u_end}]*(?:{u_end}|\Z)'
+
+    alternation = list()
+    if starts:
+        alternation.append(fr'(?P<COMMENT>{starts})')
+    alternation.append(fr'(?P<QUOTED>{quoted})')
+    alternation.append(fr'(?P<WORD>{units}{plain}*|{plain}+)')
+    alternation.append(fr'(?P<RESERVED>[^{ws}])')
+    token = fr'[{ws}]*(?:{"|".join(alternation)})|(?P<WS>[{ws}]+)'
+
+    comment_ends = dict()
+    for pair in g.comments:
+        comment_ends.setdefault(*pair)
+
+    # Only a sign or a digit (after a sign) or an octothorpe (after
+    # a radix) can continue a lexeme past where the token pattern
+    # stopped, so lex_continue() need not be consulted otherwise.
+    continuers = frozenset(g.numeric_start_chars + ('#',) + tuple(digits))
+
+    d = dict(token=re.compile(token),
+             comment_ends=comment_ends,
+             plain=re.compile(f'{plain}*'),
+             nondecimal=re.compile(r'#[^#]*(?:#|\Z)'),
+             continuers=continuers)
+    _MASTER_RE_CACHE[key] = d
+    return d
+
+
+def _lex_extend(s: str, end: int, tok: Token, g: PVLGrammar,
+                d: PVLDecoder, patterns: dict) -> Token:
+    """Returns a Token which starts at the same position in *s*
+    as *tok*, but which may be extended past the end of *tok*
+    (though not past *end*).
+
+    This is a lexer() helper function.  Numbers, non-decimal
+    numbers, and datetimes can contain or begin with reserved
+    characters, so a lexeme may need to be continued past the
+    point where the master regex from _master_re() stopped.
+    Whether it should be is decided by lex_continue().
+    """
+    start = tok.pos
+    i = start + len(tok)
+    no_preserve = dict(state=Preserve.FALSE, end=None)
+    while(i < end and
+          lex_continue(tok[-1], s[i], tok, tok, no_preserve, g)):
+        if(s[i] == '#' and
+           g.nondecimal_pre_re.fullmatch(tok + '#')):
+            i = patterns['nondecimal'].match(s, i, end).end()
+        else:
+            i += 1
+        i = patterns['plain'].match(s, i, end).end()
+        tok = Token(s[start:i], grammar=g, decoder=d, pos=start)
+    return tok
+
+
+def _token_lexer(g: PVLGrammar, d: PVLDecoder, patterns: dict):
+    """Returns a function, ``lex_token(s, end, m)``, which returns the
+    Token that begins with the match, *m*, of the master regex from
+    _master_re() on *s* (but which doesn't extend past *end*).
 
-    lexeme = ''
-    preserve = dict(state=Preserve.FALSE, end=None)
-    for i, char in enumerate(s):
-        if not g.char_allowed(char):
-            raise LexerError(f'The character "{char}" (ord: {ord(char)}) '
-                             ' is not allowed by the grammar.', s, i, lexeme)
+    This is a lexer() helper function.  The grammar *g*, the decoder
+    *d*, and the contents of *patterns* don't change while a string
+    is lexed, so they are bound into the returned function once,
+    rather than being looked up again for each Token.
+    """
+    comment_ends = patterns['comment_ends']
+    continuers = patterns['continuers']
+
+    def lex_token(s: str, end: int, m) -> Token:
+        kind = m.lastgroup
+        start = m.start(kind)
+        if kind == 'COMMENT':
+            # Rather than matching character by character, skip
+            # straight to the end of the comment (or to the end, if
+            # the comment is never closed).
+            close = comment_ends[m.group(kind)]
+            j = s.find(close, m.end(), end)
+            stop = end if j < 0 else j + len(close)
+            return Token(s[start:stop], grammar=g, decoder=d, pos=start)
+
+        tok = Token(m.group(kind), grammar=g, decoder=d, pos=start)
+        i = m.end()
+        if(i < end and s[i] in continuers and
+           kind in ('WORD', 'RESERVED')):
+            tok = _lex_extend(s, end, tok, g, d, patterns)
+        return tok
+
+    return lex_token
+
+
+def _read_allowed(f, size: int, g: PVLGrammar) -> tuple:
+    """Returns a two-tuple of up to *size* characters of text read
+    from the file object, *f*, and the index in that text of the
+    first character that is not allowed by the grammar *g*, or -1
+    if they all are.
+
+    If there is a disallowed character, the returned text ends
+    with it.
+
+    This is a lexer_stream() helper function.
+    """
+    text = f.read(size)
+    bad = g.validate(text)
+    if bad >= 0:
+        text = text[:bad + 1]
+    return (text, bad)
 
-        prev_char = _prev_char(s, i)
-        next_char = _next_char(s, i)
 
-        # print(repr(f'lexeme at top: ->{lexeme}<-, char: {char}, '
-        #            f'prev: {prev_char}, next: {next_char}, '
-        #            f'{preserve}'))
+def _lex_block(s: str, end: int, final: bool, match, lex_token,
+               offset: int):
+    """This is a generator function that yields the Tokens in *s*
+    before *end*, with *offset* added to the pos of each.  It returns
+    the position in *s* at which it stopped.
 
-        (lexeme, preserve) = lex_char(char, prev_char, next_char,
-                                      lexeme, preserve, g, c_info)
+    If *final* is false, more text may follow *s*, so a Token that
+    reaches *end* (which more text might extend) is not yielded,
+    and the returned position is where that Token begins.
 
-        # print(repr(f'       at bot: ->{lexeme}<-,          '
-        #            f'                  '
-        #            f'{preserve}'))
+    *match* is the match function of the master regex from
+    _master_re(), and *lex_token* is from _token_lexer().
 
-        # Now having dealt with char, decide whether to
-        # go on continue accumulating the lexeme, or yield it.
+    This is a lexer() and lexer_stream() helper function.
+    """
+    i = 0
+    while i < end:
+        start = i
+        m = match(s, i, end)
+        i = m.end()
 
-        if lexeme == '':
+        if m.lastgroup == 'WS':
             continue
 
+        # The lexeme is only needed for an error message, so it
+        # is not copied out of the match or the Token for every
+        # token, but only when a ValueError is raised (by the
+        # lexing, or by a user of the lexer via throw()).
+        tok = None
         try:
+            tok = lex_token(s, end, m)
+            i = tok.pos + len(tok)
+            if i == end and not final:
+                return start
+            tok.pos += offset
+
             # The ``while t is not None: yield None; t = yield(t)``
             # construction below allows a user of the lexer to
             # yield a token, not like what they see, and then use
@@ -405,32 +683,111 @@ def lexer(s: str, g=PVLGrammar(), d=PVLDecoder()):
             # value of *t* ready for the next call of next() on the
             # generator.  This is the magic that allows a user to
             # 'return' a token to the generator.
-            tok = Token(lexeme, grammar=g, decoder=d,
-                        pos=firstpos(lexeme, i))
-
-            if lex_continue(char, next_char, lexeme, tok, preserve, g):
-                # Any lexeme state that we want to just allow
-                # to run around again and don't want to get
-                # caught by the clause in the elif, should
-                # test true via lex_continue()
-                continue
-
-            elif(next_char is None
-                 or not g.char_allowed(next_char)
-                 or next_char in g.whitespace
-                 or next_char in g.reserved_characters
-                 or s.startswith(tuple(p[0] for p in g.comments), i + 1)
-                 or lexeme.endswith(tuple(p[1] for p in g.comments))
-                 or lexeme in g.reserved_characters
-                 or tok.is_quoted_string()):
-                # print(f'yielding {tok}')
-                t = yield(tok)
-                while t is not None:
-                    yield None
-                    t = yield(t)
-                lexeme = ''
-            else:
-                continue
+            t = yield(tok)
+            while t is not None:
+                yield None
+                t = yield(t)
 
         except ValueError as err:
-            raise LexerError(err, s, i, lexeme)
+            lexeme = m.group() if tok is None else str(tok)
+            raise LexerError(err, s, i - 1, lexeme)
+
+    return i
+
+
+def lexer_stream(f, g=None, d=None, size=65536):
+    """This is a generator function that returns pvl.Token objects
+    based on the text read from the file object, *f*, which must
+    have been opened in text mode, when the generator's next()
+    is called.
+
+    Unlike lexer(), the whole of the text is never held in memory.
+    It is read from *f* in blocks of (at least) *size* characters,
+    and all of the Tokens in what has been read so far are yielded,
+    except for a last one which the next block might extend.  Only
+    the text of that Token is kept when the next block is read, so
+    the memory used is bounded by *size* plus the length of the
+    longest Token.  The pos of each Token is its position in the
+    text read from *f*.
+
+    A LexerError that is raised has, as its doc, the text that was
+    being lexed rather than all of the text in *f*, so its pos,
+    lineno, and colno are relative to that.
+
+    The send() function of the generator, and *g* and *d*, are
+    as for lexer().
+    """
+    if g is None:
+        g = _DEFAULT_GRAMMAR
+    if d is None:
+        d = _DEFAULT_DECODER
+
+    patterns = _master_re(g)
+    match = patterns['token'].match
+    lex_token = _token_lexer(g, d, patterns)
+
+    buf = ''
+    offset = 0  # The position of buf[0] in the text read from f.
+    while True:
+        # Reading at least as much as is being kept means that a
+        # long Token isn't re-lexed once for every block it spans.
+        (text, bad) = _read_allowed(f, max(size, len(buf)), g)
+        final = (bad >= 0 or not text)
+        end = len(buf) + (len(text) if bad < 0 else bad)
+        buf += text
+
+        i = yield from _lex_block(buf, end, final, match, lex_token, offset)
+        if final:
+            break
+        buf = buf[i:]
+        offset += i
+
+    if end < len(buf):
+        # Everything up to the first disallowed character has been
+        # lexed, and then a LexerError is raised at that character.
+        raise _disallowed_error(buf, end)
+
+
+def _disallowed_error(s: str, pos: int) -> LexerError:
+    """Returns a LexerError for the disallowed character at
+    *pos* in *s*.
+    """
+    char = s[pos]
+    return LexerError(f'The character "{char}" (ord: {ord(char)}) '
+                      ' is not allowed by the grammar.', s, pos, '')
+
+
+def lexer(s: str, g=None, d=None):
+    """This is a generator function that returns pvl.Token objects
+    based on the passed in string, *s*, when the generator's
+    next() is called.
+
+    A call to send(*t*) will 'return' the value *t* to the
+    generator, which will be yielded upon calling next().
+    This allows a user to 'peek' at the next token, but return it
+    if they don't like what they see.
+
+    *g* is expected to be an instance of pvl.grammar, and *d* an
+    instance of pvl.decoder.  The lexer will perform differently,
+    given different values of *g* and *d*, which default to
+    a PVLGrammar and a PVLDecoder, respectively.
+    """
+    if g is None:
+        g = _DEFAULT_GRAMMAR
+    if d is None:
+        d = _DEFAULT_DECODER
+
+    patterns = _master_re(g)
+    match = patterns['token'].match
+    lex_token = _token_lexer(g, d, patterns)
+
+    # Everything up to the first disallowed character is lexed,
+    # and then a LexerError is raised at that character.
+    end = g.validate(s)
+    if end < 0:
+        end = len(s)
+
+    yield from _lex_block(s, end, True, match, lex_token, 0)
+
+    if end < len(s):
+        raise _disallowed_error(s, end)
@@ -56,12 +56,14 @@ will be thrown into the *tokens* generator iterator (via .throw()).
 import collections.abc as abc
 import re
 
+from bisect import bisect_right
+
 from ._collections import PVLModule, PVLGroup, PVLObject
 from .token import Token
 from .grammar import PVLGrammar, OmniGrammar
 from .decoder import PVLDecoder, OmniDecoder
 from .lexer import lexer as Lexer
-from .lexer import LexerError, linecount
+from .lexer import LexerError, linecount, line_starts
 
 
 class ParseError(Exception):
@@ -392,14 +394,8 @@ class PVLParser(object):
         """
         end_agg = next(tokens)
 
-        # Need to do a little song and dance to case-independently
-        # match the keys:
-        for k in self.grammar.aggregation_keywords.keys():
-            if k.casefold() == begin_agg.casefold():
-                truecase_begin = k
-                break
-        if(end_agg.casefold() !=
-           self.grammar.aggregation_keywords[truecase_begin].casefold()):
+        end_for = self.grammar.end_aggregation_for(begin_agg)
+        if end_for is None or end_agg.casefold() != end_for.casefold():
             tokens.send(end_agg)
             raise ValueError('Expecting an End-Aggegation-Statement that '
                              'matched the Begin-Aggregation_Statement, '
@@ -745,9 +741,34 @@ class OmniParser(PVLParser):
     all forms of "PVL" that are thrown at it.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # A two-tuple of a document and the result of line_starts()
+        # for it, see _lineno().
+        self._line_index = (None, None)
+
+    def _lineno(self, pos: int) -> int:
+        """Returns the line number of the position *pos* in this
+        parser's doc, the same as linecount(self.doc, pos).
+
+        A permissive parse may find many empty values, so the line
+        that each is on is looked up in an index of the lines of
+        the doc, which is only rebuilt if the doc changes, rather
+        than counted out every time.
+        """
+        if pos < 0:
+            return linecount(self.doc, pos)
+
+        (doc, starts) = self._line_index
+        if doc is not self.doc:
+            starts = line_starts(self.doc)
+            self._line_index = (self.doc, starts)
+        return bisect_right(starts, pos)
+
     def _empty_value(self, pos):
         eq_pos = self.doc.rfind('=', 0, pos)
-        lc = linecount(self.doc, eq_pos)
+        lc = self._lineno(eq_pos)
         self.errors.append(lc)
         return EmptyValueAtLine(lc)
 
@@ -847,11 +868,9 @@ class OmniParser(PVLParser):
 
         t = next(tokens)
         # print(f't: {t}')
-        truecase_reserved = [x.casefold() for x in
-                             self.grammar.reserved_keywords]
         trucase_delim = [x.casefold() for x in
                          self.grammar.delimiters]
-        if t.casefold() in (truecase_reserved + trucase_delim):
+        if self.grammar.is_reserved(t) or t.casefold() in trucase_delim:
             # print(f'kw: {kw}')
             # if kw.casefold() == t.casefold():
             # print('match')
@@ -112,7 +112,7 @@ class Token(str):
         if len(self) == 0:
             return False
 
-        return all(c in self.grammar.whitespace for c in self)
+        return self.grammar.whitespace_set.issuperset(self)
 
     def is_WSC(self) -> bool:
         """Return true if the Token is white space characters or comments
@@ -173,10 +173,7 @@ class Token(str):
         keyword (e.g. 'BEGIN_GROUP' in PVL) according to
         the Token's grammar, false otherwise.
         """
-        for k in self.grammar.aggregation_keywords.keys():
-            if self.casefold() == k.casefold():
-                return True
-        return False
+        return self.grammar.end_aggregation_for(self) is not None
 
     def is_unquoted_string(self) -> bool:
         """Return false if the Token has any
@@ -185,9 +182,8 @@ class Token(str):
         date, or time according to the Token's grammar,
         true otherwise.
         """
-        for char in self.grammar.reserved_characters:
-            if char in self:
-                return False
+        if not self.grammar.reserved_set.isdisjoint(self):
+            return False
 
         for pair in self.grammar.comments:
             if pair[0] in self:
@@ -195,12 +191,11 @@ class Token(str):
             if pair[1] in self:
                 return False
 
-        if self.is_numeric() or self.is_datetime():
+        if not self.grammar.whitespace_set.isdisjoint(self):
             return False
 
-        for char in self.grammar.whitespace:
-            if char in self:
-                return False
+        if self.is_numeric() or self.is_datetime():
+            return False
 
         return True
 
@@ -217,9 +212,8 @@ class Token(str):
         isn't a reserved_keyword according to the Token's
         grammar, false otherwise.
         """
-        for word in self.grammar.reserved_keywords:
-            if word.casefold() == self.casefold():
-                return False
+        if self.grammar.is_reserved(self):
+            return False
 
         return self.is_unquoted_string()
 
@@ -227,10 +221,7 @@ class Token(str):
         """Return true if the Token matches an end statement
         from its grammar, false otherwise.
         """
-        for e in self.grammar.end_statements:
-            if e.casefold() == self.casefold():
-                return True
-        return False
+        return self.grammar.is_end_statement(self)
 
     def isnumeric(self) -> bool:
         """Overrides ``str.isnumeric()`` to be the same as Token's
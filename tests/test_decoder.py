@@ -19,7 +19,9 @@ import datetime
 import itertools
 import unittest
 
-from pvl.decoder import PVLDecoder, ODLDecoder, for_try_except
+from pvl.decoder import (PVLDecoder, ODLDecoder, for_try_except,
+                         match_datetime)
+from pvl.grammar import PVLGrammar, formats_re
 from pvl._collections import Units
 
 
@@ -39,6 +41,21 @@ class TestForTryExcept(unittest.TestCase):
                                         ('%Y-%m-%d', '%Y-%j')).date())
 
 
+class TestMatchDatetime(unittest.TestCase):
+
+    def test_match_datetime(self):
+        r = formats_re(('%Y-%m-%d', '%Y-%j', '%H:%M:%S.%f'))
+        self.assertEqual(datetime.datetime(2001, 2, 3),
+                         match_datetime(r, '2001-02-03'))
+        self.assertEqual(datetime.datetime(2001, 2, 1),
+                         match_datetime(r, '2001-032'))
+        self.assertEqual(datetime.datetime(1900, 1, 1, 1, 2, 3, 120000),
+                         match_datetime(r, '01:02:03.12'))
+        for s in ('2001-02-30', '01:02:60.1', '01:02', 'foo'):
+            with self.subTest(string=s):
+                self.assertRaises(ValueError, match_datetime, r, s)
+
+
 class TestDecoder(unittest.TestCase):
 
     def setUp(self):
@@ -89,6 +106,10 @@ class TestDecoder(unittest.TestCase):
             with self.subTest(pair=p):
                     self.assertEqual(p[1], self.d.decode_non_decimal(p[0]))
 
+        for s in ('2#0102#', '8#0108#', '16#10G#', '10#10#', '2#01'):
+            with self.subTest(string=s):
+                self.assertRaises(ValueError, self.d.decode_non_decimal, s)
+
     def test_decode_datetime(self):
         for p in(('2001-01-01', datetime.date(2001, 1, 1)),
                  ('2001-027', datetime.date(2001, 1, 27)),
@@ -109,6 +130,16 @@ class TestDecoder(unittest.TestCase):
         fancy = '2001-001T01:10:39+7'
         self.assertRaises(ValueError, self.d.decode_datetime, fancy)
 
+        class G(PVLGrammar):
+            date_formats = PVLGrammar.date_formats + ('%d %b %Y',)
+
+        d = PVLDecoder(grammar=G())
+        self.assertEqual(datetime.date(2001, 2, 3),
+                         d.decode_datetime('03 Feb 2001'))
+        self.assertEqual(datetime.date(2001, 1, 27),
+                         d.decode_datetime('2001-027'))
+        self.assertRaises(ValueError, d.decode_datetime, '03 Fob 2001')
+
     def test_decode_simple_value(self):
         for p in(('2001-01-01', datetime.date(2001, 1, 1)),
                  ('2#0101#', 5),
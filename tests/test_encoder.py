@@ -4,6 +4,7 @@ import datetime
 import unittest
 
 from pvl.encoder import PVLEncoder, ODLEncoder, PDSLabelEncoder
+from pvl.grammar import PVLGrammar
 from pvl._collections import Units, PVLModule, PVLGroup, PVLObject
 
 
@@ -19,6 +20,7 @@ class TestDecoder(unittest.TestCase):
 
         s = 'keyword = ' + ('a' * 100)
         self.assertEqual(s, self.e.format(s))
+        self.assertEqual(f'  {s}', self.e.format(s, 1))
 
         k = 'keyword = '
         a60 = ('a' * 60)
@@ -43,13 +45,30 @@ class TestDecoder(unittest.TestCase):
         s = 'AB CD'
         self.assertEqual(f'"{s}"', self.e.encode_string(s))
 
+        s = 'AB=CD'
+        self.assertEqual(f'"{s}"', self.e.encode_string(s))
+
         s = '''Both"kinds'of quotes'''
         self.assertRaises(ValueError, self.e.encode_string, s)
 
+        class G(PVLGrammar):
+            reserved_characters = PVLGrammar.reserved_characters + ('@',)
+
+        s = 'a@b'
+        self.assertEqual(s, self.e.encode_string(s))
+        self.assertEqual(f'"{s}"', PVLEncoder(grammar=G()).encode_string(s))
+
+        g = PVLGrammar()
+        g.reserved_characters += ('@',)
+        self.assertEqual(f'"{s}"', PVLEncoder(grammar=g).encode_string(s))
+
     def test_encode_date(self):
         t = datetime.date(2019, 12, 31)
         self.assertEqual('2019-12-31', self.e.encode_date(t))
 
+        t = datetime.date(999, 1, 2)
+        self.assertEqual('0999-01-02', self.e.encode_date(t))
+
     def test_encode_time(self):
         t = datetime.time(1, 2)
         self.assertEqual('01:02', self.e.encode_time(t))
@@ -88,6 +107,12 @@ class TestDecoder(unittest.TestCase):
             with self.subTest(pair=p):
                 self.assertEqual(p[1], self.e.encode_simple_value(p[0]))
 
+        class MyStr(str):
+            pass
+
+        self.assertEqual('ABC', self.e.encode_simple_value(MyStr('ABC')))
+        self.assertRaises(TypeError, self.e.encode_simple_value, object())
+
     def test_encode_value(self):
         pairs = ((42, '42'),
                  (Units(34, 'm/s'), '34 <m/s>'))
@@ -128,6 +153,13 @@ END_GROUP = foo;
 END;'''
         self.assertEqual(s, self.e.encode(m))
 
+        class G(PVLGrammar):
+            def char_allowed(self, char):
+                return char != '@' and super().char_allowed(char)
+
+        self.assertRaises(ValueError,
+                          PVLEncoder(grammar=G()).encode, {'a': 'b@c'})
+
     def test_encode_quantity(self):
         q, s = Units(34, 'm/s'), '34 <m/s>'
         self.assertEqual(s, self.e.encode_quantity(q))
@@ -186,6 +218,9 @@ class TestPDSLabelEncoder(unittest.TestCase):
         m = PVLModule(a=PVLGroup(), b=PVLObject(), c=PVLObject())
         self.assertEqual((2, 1), self.e.count_aggs(m))
 
+        m = PVLModule(a=PVLGroup(), b=dict(), c=PVLGroup(), d=5)
+        self.assertEqual((1, 2), self.e.count_aggs(m))
+
     def test_is_PDSgroup(self):
         g = PVLGroup(a='b', c=PVLGroup())
         self.assertFalse(self.e.is_PDSgroup(g))
@@ -199,6 +234,25 @@ class TestPDSLabelEncoder(unittest.TestCase):
         g = PVLGroup((('a', 'b'), ('c', 'd'), ('a', 'b2')))
         self.assertFalse(self.e.is_PDSgroup(g))
 
+        g = PVLGroup(a='b')
+        self.assertTrue(self.e.is_PDSgroup(g))
+        self.assertTrue(self.e.is_PDSgroup(g))
+        g['c'] = PVLGroup()
+        self.assertFalse(self.e.is_PDSgroup(g))
+        del g['c']
+        self.assertTrue(self.e.is_PDSgroup(g))
+        g.append('a', 'b2')
+        self.assertFalse(self.e.is_PDSgroup(g))
+
+        class E(PDSLabelEncoder):
+            def _is_PDSgroup(self, group):
+                return False
+
+        g = PVLGroup(a='b')
+        self.assertTrue(self.e.is_PDSgroup(g))
+        self.assertFalse(E().is_PDSgroup(g))
+        self.assertFalse(hasattr(g, '_is_PDSgroup'))
+
     def test_convert_grp_to_obj(self):
         g = PVLGroup(a='b', c='d')
         o = PVLObject(a='b', c='d')
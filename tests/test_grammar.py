@@ -18,7 +18,7 @@
 import re
 import unittest
 
-from pvl.grammar import PVLGrammar
+from pvl.grammar import PVLGrammar, ODLGrammar, OmniGrammar, formats_re
 
 
 class TestLeapSeconds(unittest.TestCase):
@@ -135,3 +135,141 @@ class TestLeapSeconds(unittest.TestCase):
         for c in ('\b', chr(127)):
             with self.subTest(char=c):
                 self.assertFalse(self.g.char_allowed(c))
+
+    def test_validate(self):
+        self.assertEqual(-1, self.g.validate('a b\né'))
+        self.assertEqual(1, self.g.validate('a\bb'))
+        self.assertEqual(2, self.g.validate('abΔ\b'))
+
+        class G(PVLGrammar):
+            def char_allowed(self, char):
+                return char != '@' and super().char_allowed(char)
+
+        class O(ODLGrammar):
+            def char_allowed(self, char):
+                return char != '@' and super().char_allowed(char)
+
+        for g in (G(), O()):
+            with self.subTest(grammar=g):
+                self.assertEqual(-1, g.validate('a b'))
+                self.assertEqual(3, g.validate('a b@c'))
+        self.assertEqual(1, G().validate('a\b@'))
+
+    def test_comment_starts_ends(self):
+        self.assertEqual(('/*',), self.g.comment_starts)
+        self.assertEqual(('*/',), self.g.comment_ends)
+
+        g = OmniGrammar()
+        self.assertEqual(('/*', '#'), g.comment_starts)
+        self.assertEqual(('*/', '\n'), g.comment_ends)
+
+    def test_numeric_start_re(self):
+        for s in ('+7', '-0'):
+            with self.subTest(string=s):
+                self.assertIsNotNone(self.g.numeric_start_re.fullmatch(s))
+        for s in ('+', '+a', '-.', '7+'):
+            with self.subTest(string=s):
+                self.assertIsNone(self.g.numeric_start_re.fullmatch(s))
+
+        class G(PVLGrammar):
+            numeric_start_chars = ('+', '-', '~')
+
+        self.assertIsNotNone(G().numeric_start_re.fullmatch('~7'))
+        self.assertIsNone(self.g.numeric_start_re.fullmatch('~7'))
+
+    def test_is_reserved(self):
+        for s in ('END', 'End_Group', 'begin_object', 'Object'):
+            with self.subTest(string=s):
+                self.assertTrue(self.g.is_reserved(s))
+        for s in ('ENDS', 'foo', 'END_'):
+            with self.subTest(string=s):
+                self.assertFalse(self.g.is_reserved(s))
+
+    def test_instance_changes(self):
+        g = PVLGrammar()
+        g.reserved_characters += ('@',)
+        g.whitespace += ('_',)
+        g.numeric_start_chars += ('~',)
+        g.end_statements += ('STOP',)
+        g.date_formats += ('%Y/%m/%d',)
+        self.assertIn('@', g.reserved_set)
+        self.assertIn('_', g.whitespace_set)
+        self.assertIsNotNone(g.numeric_start_re.fullmatch('~7'))
+        self.assertTrue(g.is_end_statement('Stop'))
+        self.assertIsNotNone(g.date_re.fullmatch('2001/02/03'))
+
+        for x in (self.g.reserved_set, self.g.whitespace_set):
+            with self.subTest(set=x):
+                self.assertTrue(x.isdisjoint('@_'))
+        self.assertIsNone(self.g.numeric_start_re.fullmatch('~7'))
+        self.assertFalse(self.g.is_end_statement('Stop'))
+
+    def test_aggregation_keywords(self):
+        for s in ('Begin_Group', 'end_group', 'OBJECT', 'End_Object'):
+            with self.subTest(string=s):
+                self.assertTrue(self.g.is_aggregation_keyword(s))
+        for s in ('END', 'foo', 'GROUPS'):
+            with self.subTest(string=s):
+                self.assertFalse(self.g.is_aggregation_keyword(s))
+
+        self.assertTrue(self.g.is_end_statement('end'))
+        self.assertFalse(self.g.is_end_statement('end_group'))
+
+        self.assertEqual('END_GROUP', self.g.end_aggregation_for('begin_group'))
+        self.assertIsNone(self.g.end_aggregation_for('end_group'))
+
+    def test_nondecimal_re(self):
+        for g in (PVLGrammar(), ODLGrammar(), OmniGrammar()):
+            with self.subTest(grammar=g):
+                self.assertIsNotNone(g.nondecimal_re.fullmatch('16#1aF#'))
+                self.assertIsNone(g.nondecimal_re.fullmatch('16#1|F#'))
+        self.assertIsNone(self.g.hex_re.fullmatch('16#1|F#'))
+
+
+class TestFormatsRe(unittest.TestCase):
+
+    def test_formats_re(self):
+        r = formats_re(('%Y-%j', '%H:%M'))
+        m = r.fullmatch('2001-032')
+        self.assertEqual('fmt0', m.lastgroup)
+        self.assertEqual('032', m.group('j0'))
+
+        m = r.fullmatch('1:02')
+        self.assertEqual('fmt1', m.lastgroup)
+        self.assertEqual('1', m.group('H1'))
+
+        self.assertIsNone(r.fullmatch('2001-032T1:02'))
+        self.assertRaises(ValueError, formats_re, ('%y',))
+
+        r = formats_re(('%Y %j',))
+        self.assertIsNotNone(r.fullmatch('2001 \t 032'))
+        self.assertIsNone(r.fullmatch('2001032'))
+
+        class G(PVLGrammar):
+            date_formats = PVLGrammar.date_formats + ('%Y/%m/%d',)
+
+        self.assertIsNotNone(G().date_re.fullmatch('2001/02/03'))
+        self.assertIsNone(PVLGrammar().date_re.fullmatch('2001/02/03'))
+
+        class B(PVLGrammar):
+            date_formats = PVLGrammar.date_formats + ('%d %b %Y',)
+
+        self.assertIsNone(B().date_re)
+
+
+class TestODLGrammar(unittest.TestCase):
+
+    def test_allowed(self):
+        g = ODLGrammar()
+        for c in ('a', 'b', ' ', '\n', '\b', chr(127)):
+            with self.subTest(char=c):
+                self.assertTrue(g.char_allowed(c))
+
+        for c in (chr(128), 'é', 'Δ'):
+            with self.subTest(char=c):
+                self.assertFalse(g.char_allowed(c))
+
+    def test_validate(self):
+        g = ODLGrammar()
+        self.assertEqual(-1, g.validate('a b\n\b'))
+        self.assertEqual(2, g.validate('abé'))
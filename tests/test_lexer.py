@@ -15,9 +15,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
+import io
+import re
 import unittest
 
-from pvl.grammar import PVLGrammar, OmniGrammar
+from pvl.grammar import PVLGrammar, ODLGrammar, OmniGrammar
+from pvl.decoder import PVLDecoder
 
 import pvl.lexer as Lexer
 
@@ -32,6 +36,15 @@ class TestInternal(unittest.TestCase):
         self.assertIsNone(Lexer._next_char('foo', 2))
         self.assertEqual('b', Lexer._next_char('fob', 1))
 
+    def test_line_starts(self):
+        doc = 'a = b\n\nc = d\ne = f'
+        starts = Lexer.line_starts(doc)
+        self.assertEqual([0, 6, 7, 13], starts)
+        for pos in range(len(doc)):
+            with self.subTest(pos=pos):
+                self.assertEqual(Lexer.linecount(doc, pos),
+                                 bisect.bisect_right(starts, pos))
+
     def test_prepare_comment_tuples(self):
         d = dict(single_comments=dict(),
                  multi_comments=(('/*', '*/'),),
@@ -45,6 +58,95 @@ class TestInternal(unittest.TestCase):
                  chars=set('/*#'))
         self.assertEqual(d, Lexer._prepare_comment_tuples((('/*', '*/'),
                                                           ('#', '\n'))))
+        self.assertIs(Lexer._prepare_comment_tuples((('/*', '*/'),)),
+                      Lexer._prepare_comment_tuples((('/*', '*/'),)))
+
+        d = Lexer._prepare_comment_tuples((('/*', '*/'), ('#', '\n')))
+        with self.assertRaises(TypeError):
+            d['chars'] = set()
+        with self.assertRaises(TypeError):
+            d['single_comments']['%'] = '\n'
+
+    def test_trie_re(self):
+        self.assertEqual('', Lexer._trie_re(()))
+        self.assertEqual(r'/\*', Lexer._trie_re(('/*',)))
+        p = Lexer._trie_re(('/*', '#', '//', '/'))
+        self.assertEqual(r'(?:/(?:\*|/|)|\#)', p)
+        for s, match in (('/* c', '/*'), ('// c', '//'),
+                         ('/ c', '/'), ('# c', '#')):
+            with self.subTest(string=s):
+                self.assertEqual(match, re.match(p, s).group())
+
+    def test_master_re(self):
+        p = Lexer._master_re(PVLGrammar())
+        self.assertIs(p, Lexer._master_re(PVLGrammar()))
+        self.assertIsNot(p, Lexer._master_re(OmniGrammar()))
+
+        triples = (('  \n', '  \n', 'WS'),
+                   ('/* comment */', '/*', 'COMMENT'),
+                   ('"quoted"', '"quoted"', 'QUOTED'),
+                   ('<m/s>', '<m/s>', 'WORD'),
+                   ('word', 'word', 'WORD'),
+                   (' \t word', 'word', 'WORD'),
+                   ('=', '=', 'RESERVED'))
+        for s, lexeme, kind in triples:
+            with self.subTest(string=s):
+                m = p['token'].match(s)
+                self.assertEqual(lexeme, m.group(m.lastgroup))
+                self.assertEqual(kind, m.lastgroup)
+        self.assertEqual({'/*': '*/'}, p['comment_ends'])
+        self.assertIn('#', p['continuers'])
+        self.assertNotIn('=', p['continuers'])
+
+    def test_token_lexer(self):
+        g = PVLGrammar()
+        patterns = Lexer._master_re(g)
+        lex_token = Lexer._token_lexer(g, PVLDecoder(), patterns)
+        for s, lexeme in (('a /* c */ b', '/* c */'),
+                          ('a /* c', '/* c'),
+                          ('a 2#0101# b', '2#0101#'),
+                          ('a -7 b', '-7'),
+                          ('a word b', 'word')):
+            with self.subTest(string=s):
+                m = patterns['token'].match(s, 1)
+                tok = lex_token(s, len(s), m)
+                self.assertEqual(lexeme, tok)
+                self.assertEqual(2, tok.pos)
+
+    def test_is_numeric(self):
+        g = PVLGrammar()
+        self.assertTrue(Lexer._is_numeric('+7', g))
+        self.assertTrue(Lexer._is_numeric('2#0101#', g))
+        self.assertFalse(Lexer._is_numeric('+a', g))
+
+    def test_is_datetime(self):
+        g = PVLGrammar()
+        d = PVLDecoder(g)
+        self.assertTrue(Lexer._is_datetime('01:02', g, d))
+        self.assertFalse(Lexer._is_datetime('foo', g, d))
+
+    def test_decode_cache(self):
+        self.assertTrue(Lexer._is_numeric('-8#7#', PVLGrammar()))
+        self.assertIn(('numeric', '-8#7#', PVLGrammar.nondecimal_re),
+                      Lexer._DECODE_CACHE)
+        self.assertFalse(Lexer._is_numeric('-8#7#', ODLGrammar()))
+        self.assertTrue(Lexer._is_numeric('8#-7#', ODLGrammar()))
+
+        class A(PVLGrammar):
+            time_formats = ('%H:%M %p',)
+
+        class B(PVLGrammar):
+            time_formats = ('%I:%M %p',)
+
+        for (g, expected) in ((A(), True), (B(), False)):
+            with self.subTest(grammar=g):
+                self.assertEqual(expected, Lexer._is_datetime(
+                    '13:05 PM', g, PVLDecoder(g)))
+
+        for key in Lexer._DECODE_CACHE:
+            for k in key:
+                with self.subTest(key=key):
+                    self.assertNotIsInstance(k, (PVLGrammar, PVLDecoder))
 
 
 class TestLexComments(unittest.TestCase):
@@ -112,6 +214,9 @@ class TestLexComments(unittest.TestCase):
                                            dict(single_comments={'k': 'v'},
                                                 multi_comments=(('/*', '*/'),),
                                                 multi_chars=set(('/', '*')))))
+        self.assertEqual(('/*', pcom),
+                         Lexer.lex_comment('*', '/', 'c', '', pfn,
+                                           (('/*', '*/'),)))
 
 
 class TestLexer(unittest.TestCase):
@@ -255,6 +360,54 @@ class TestLexer(unittest.TestCase):
 
         self.assertEqual("Two", next(tokens))
 
+    def test_disallowed(self):
+        tokens = Lexer.lexer('One T\bwo')
+        self.assertEqual('One', next(tokens))
+        self.assertEqual('T', next(tokens))
+        self.assertRaises(Lexer.LexerError, next, tokens)
+
+        class G(PVLGrammar):
+            def char_allowed(self, char):
+                return char != '@' and super().char_allowed(char)
+
+        s = 'a = b@c'
+        self.assertRaises(Lexer.LexerError, list, Lexer.lexer(s, G()))
+        self.assertRaises(Lexer.LexerError, list,
+                          Lexer.lexer_stream(io.StringIO(s), G()))
+
+    def test_lexer_stream(self):
+        s = """a = 'one;two'; b = <m;s>
+           /* c = 3; */ d = 2#01;#; e = +4;
+           f = (5, 6); g = "seven";
+           END"""
+        for size in (1, 7, 1000):
+            with self.subTest(size=size):
+                out = list(Lexer.lexer_stream(io.StringIO(s), size=size))
+                self.assertEqual(self.get_tokens(s), out)
+                self.assertEqual([t.pos for t in Lexer.lexer(s)],
+                                 [t.pos for t in out])
+
+        # Without any Statement Delimiters, and with a non-decimal
+        # number that a Statement Delimiter model would misplace.
+        g = ODLGrammar()
+        s = 'a = "one\ntwo"\nb = 16#FF#\n/* c\n */ d = +8#6#;T\nEND'
+        for size in (1, 5, 1000):
+            with self.subTest(size=size):
+                out = list(Lexer.lexer_stream(io.StringIO(s), g=g,
+                                              size=size))
+                self.assertEqual(list(Lexer.lexer(s, g=g)), out)
+                self.assertEqual([t.pos for t in Lexer.lexer(s, g=g)],
+                                 [t.pos for t in out])
+
+        tokens = Lexer.lexer_stream(io.StringIO('a = 1; b = T\bwo;'), size=4)
+        self.assertEqual(['a', '=', '1', ';', 'b', '=', 'T'],
+                         [next(tokens) for i in range(7)])
+        self.assertRaises(Lexer.LexerError, next, tokens)
+
+        tokens = Lexer.lexer_stream(io.StringIO('a = 1;'))
+        next(tokens)
+        self.assertRaises(Lexer.LexerError, tokens.throw, ValueError('no'))
+
     def test_lex_char(self):
         g = PVLGrammar()
         p = dict(state=Lexer.Preserve.FALSE, end='end')
@@ -264,6 +417,8 @@ class TestLexer(unittest.TestCase):
                                         dict(chars=set(['k', 'v', '/', '*']),
                                              single_comments={'k': 'v'},
                                              multi_chars=set(('/', '*')))))
+        self.assertEqual(('/*', dict(state=Lexer.Preserve.COMMENT, end='*/')),
+                         Lexer.lex_char('*', '/', 'c', '', p, g))
 
     def test_lexer_recurse(self):
 
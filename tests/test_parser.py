@@ -299,6 +299,14 @@ class TestOmni(unittest.TestCase):
         self.assertEqual((mod, False),
                          self.p.parse_module_post_hook(m, tokens))
 
+    def test_empty_value(self):
+        self.p.doc = 'a = b\nc = \nd = e'
+        self.assertEqual(2, self.p._empty_value(10).lineno)
+
+        self.p.doc = 'a = \nb = c'
+        self.assertEqual(1, self.p._empty_value(4).lineno)
+        self.assertEqual([2, 1], self.p.errors)
+
     def test_comments(self):
         some_pvl = ("""
         /* comment on line */
@@ -181,6 +181,11 @@ class TestToken(unittest.TestCase):
                 t = Token(s)
                 self.assertFalse(t.is_unquoted_string())
 
+        g = PVLGrammar()
+        g.reserved_characters += ('@',)
+        self.assertTrue(Token('a@b').is_unquoted_string())
+        self.assertFalse(Token('a@b', grammar=g).is_unquoted_string())
+
     def test_is_quoted_string(self):
         for s in ('"Hello &"', "'Product Id'", '""'):
             with self.subTest(string=s):